@@ -169,14 +169,19 @@ def Object(theType, offset, vm, name = None, **kwargs):
     name = name or theType
     offset = int(offset)
 
-    try:
-        if vm.profile.has_type(theType):
-            result = vm.profile.types[theType](offset = offset, vm = vm, name = name, **kwargs)
-            return result
-    except InvalidOffsetError:
-        ## If we cant instantiate the object here, we just error out:
-        return NoneObject("Invalid Address 0x{0:08X}, instantiating {1}".format(offset, name),
-                          strict = vm.profile.strict)
+    # The profile's types dict already maps each type name to its
+    # partially applied constructor, so resolve it with a single
+    # lookup. This function is the hottest path in the object layer
+    # and the separate has_type membership test doubled the dict work
+    # for every object materialized.
+    cls = vm.profile.types.get(theType)
+    if cls is not None:
+        try:
+            return cls(offset = offset, vm = vm, name = name, **kwargs)
+        except InvalidOffsetError:
+            ## If we cant instantiate the object here, we just error out:
+            return NoneObject("Invalid Address 0x{0:08X}, instantiating {1}".format(offset, name),
+                              strict = vm.profile.strict)
 
     ## If we get here we have no idea what the type is supposed to be?
     ## This is a serious error.
@@ -882,7 +887,7 @@ class Profile(object):
             the profiles loaded in memory all at once.
         """
         ntvar = self.metadata.get('memory_model', '32bit')
-        self.native_types = copy.deepcopy(self.native_mapping.get(ntvar))
+        self.native_types = native_types.copy_native_types(self.native_mapping.get(ntvar))
 
         vtype_module = self.metadata.get('vtype_module', None)
         if not vtype_module:
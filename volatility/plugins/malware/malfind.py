@@ -54,7 +54,15 @@ class MalwareEPROCESS(windows._EPROCESS):
     @property
     def IsWow64(self):
         """Returns True if this is a wow64 process"""
-        return hasattr(self, 'Wow64Process') and self.Wow64Process.v() != 0
+        # hasattr would drive an AttributeError through the object
+        # layer on every query. Whether _EPROCESS has the member at
+        # all is a property of the profile, so resolve it once.
+        profile = self.obj_vm.profile
+        has_member = getattr(profile, '_eprocess_has_wow64', None)
+        if has_member is None:
+            has_member = 'Wow64Process' in self.members
+            profile._eprocess_has_wow64 = has_member
+        return has_member and self.Wow64Process.v() != 0
 
     @property
     def SessionId(self):
@@ -26,7 +26,6 @@
 """
 
 import os, struct, socket
-import copy
 import zipfile
 
 import volatility.plugins
@@ -42,7 +41,7 @@ import volatility.addrspace as addrspace
 import volatility.utils as utils
 import volatility.protos as protos
 
-x64_native_types = copy.deepcopy(native_types.x64_native_types)
+x64_native_types = native_types.copy_native_types(native_types.x64_native_types)
 
 x64_native_types['long'] = [8, '<q']
 x64_native_types['unsigned long'] = [8, '<Q']
@@ -248,7 +247,7 @@ def LinuxProfileFactory(profpkg):
         def load_vtypes(self):
             """Loads up the vtypes data"""
             ntvar = self.metadata.get('memory_model', '32bit')
-            self.native_types = copy.deepcopy(self.native_mapping.get(ntvar))
+            self.native_types = native_types.copy_native_types(self.native_mapping.get(ntvar))
 
             vtypesvar = dwarf.DWARFParser(dwarfdata).finalize()
             self._merge_anonymous_members(vtypesvar)
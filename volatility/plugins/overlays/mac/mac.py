@@ -18,7 +18,7 @@
 # along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import re,copy
+import re
 import sys, os
 import zipfile
 import struct
@@ -35,7 +35,7 @@ import volatility.plugins.overlays.native_types as native_types
 import volatility.utils as utils
 import volatility.plugins.mac.common as common
 
-x64_native_types = copy.deepcopy(native_types.x64_native_types)
+x64_native_types = native_types.copy_native_types(native_types.x64_native_types)
 
 x64_native_types['long'] = [8, '<q']
 x64_native_types['unsigned long'] = [8, '<Q']
@@ -802,7 +802,7 @@ def MacProfileFactory(profpkg):
         def load_vtypes(self):
             """Loads up the vtypes data"""
             ntvar = self.metadata.get('memory_model', '32bit')
-            self.native_types = copy.deepcopy(self.native_mapping.get(ntvar))
+            self.native_types = native_types.copy_native_types(self.native_mapping.get(ntvar))
 
             self.vtypes.update(vtypesvar)
 
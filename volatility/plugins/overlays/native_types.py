@@ -1,5 +1,3 @@
-import copy
-
 ## The following is a conversion of basic C99 types to python struct
 ## format strings. NOTE: since volatility is analysing images which
 ## are not necessarily the same bit size as the currently running
@@ -21,5 +19,12 @@ x86_native_types = {
     'unsigned long long' : [8, '<Q'],
     }
 
-x64_native_types = copy.deepcopy(x86_native_types)
+## Native type tables are shallow {name: [size, format]} dicts of
+## immutable leaves. copy.deepcopy walks a memo dict per node, which
+## is wasted work on the import path of every volatility invocation,
+## so this helper clones just the two levels that ever get mutated.
+def copy_native_types(native_types):
+    return dict((name, list(value)) for name, value in native_types.items())
+
+x64_native_types = copy_native_types(x86_native_types)
 x64_native_types['address'] = [8, '<Q']
@@ -137,10 +137,20 @@ class _OBJECT_HEADER(windows._OBJECT_HEADER):
         """Find this object's optional headers."""
         offset = self.obj_offset
         info_mask = int(self.InfoMask)
-
-        for name, struct, mask in self.optional_header_mask:
+        profile = self.obj_vm.profile
+
+        # The optional header sizes are fixed per profile; resolve
+        # them once instead of a get_obj_size call per header per
+        # object.
+        sizes = getattr(profile, '_object_header_optional_sizes', None)
+        if sizes is None:
+            sizes = [(name, struct, mask, profile.get_obj_size(struct))
+                     for name, struct, mask in self.optional_header_mask]
+            profile._object_header_optional_sizes = sizes
+
+        for name, struct, mask, size in sizes:
             if info_mask & mask:
-                offset -= self.obj_vm.profile.get_obj_size(struct)
+                offset -= size
                 o = obj.Object(struct, offset, self.obj_vm, native_vm = self.obj_native_vm)
             else:
                 o = obj.NoneObject("Header {0} not set for object at {1:#x}".format(name, offset))
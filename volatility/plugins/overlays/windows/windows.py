@@ -18,7 +18,7 @@
 # along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import datetime, struct
+import bisect, codecs, datetime, struct
 import volatility.plugins.overlays.basic as basic
 import volatility.plugins.kpcrscan as kpcr
 import volatility.plugins.kdbgscan as kdbg
@@ -28,6 +28,30 @@ import volatility.obj as obj
 import volatility.addrspace as addrspace
 import volatility.exceptions as exceptions
 
+# Length and count callables used by the overlay below. These are
+# bound once at module import so that a single shared callable serves
+# every profile, instead of a fresh closure per overlay merge. They
+# must be plain module-level functions: copy.deepcopy (which
+# _apply_overlay runs over the vtypes) treats functions atomically but
+# cannot copy operator.attrgetter instances.
+def _get_name_length(x):
+    return x.NameLength
+
+def _get_count(x):
+    return x.Count
+
+def _get_number_of_runs(x):
+    return x.NumberOfRuns
+
+def _get_user_and_group_count(x):
+    return x.UserAndGroupCount
+
+def _get_sub_authority_count(x):
+    return x.SubAuthorityCount
+
+def _count_times_two(x):
+    return x.Count.v() * 2
+
 # Standard vtypes are usually autogenerated by scanning through header
 # files, collecting debugging symbol data etc. This file defines
 # fixups and improvements to the standard types.
@@ -103,26 +127,26 @@ windows_overlay = {
     '_CM_KEY_NODE' : [ None, {
     'Signature' : [ None, ['String', dict(length = 2)]],
     'LastWriteTime' : [ None, ['WinTimeStamp', dict(is_utc = True)]],
-    'Name' : [ None, ['String', dict(length = lambda x: x.NameLength)]],
+    'Name' : [ None, ['String', dict(length = _get_name_length)]],
     }],
 
     '_CM_NAME_CONTROL_BLOCK' : [ None, {
-    'Name' : [ None, ['String', dict(length = lambda x: x.NameLength)]],
+    'Name' : [ None, ['String', dict(length = _get_name_length)]],
     }],
 
     '_CHILD_LIST' : [ None, {
-    'List' : [ None, ['pointer', ['array', lambda x: x.Count,
+    'List' : [ None, ['pointer', ['array', _get_count,
                                  ['pointer', ['_CM_KEY_VALUE']]]]],
     }],
 
     '_CM_KEY_VALUE' : [ None, {
     'Signature' : [ None, ['String', dict(length = 2)]],
-    'Name' : [ None, ['String', dict(length = lambda x: x.NameLength)]],
+    'Name' : [ None, ['String', dict(length = _get_name_length)]],
     }],
 
     '_CM_KEY_INDEX' : [ None, {
     'Signature' : [ None, ['String', dict(length = 2)]],
-    'List' : [ None, ['array', lambda x: x.Count.v() * 2, ['pointer', ['_CM_KEY_NODE']]]],
+    'List' : [ None, ['array', _count_times_two, ['pointer', ['_CM_KEY_NODE']]]],
     }],
 
     'PO_MEMORY_IMAGE' : [ None, {
@@ -131,16 +155,16 @@ windows_overlay = {
     }],
 
     '_PHYSICAL_MEMORY_DESCRIPTOR' : [ None, {
-    'Run' : [ None, ['array', lambda x: x.NumberOfRuns, ['_PHYSICAL_MEMORY_RUN']]],
+    'Run' : [ None, ['array', _get_number_of_runs, ['_PHYSICAL_MEMORY_RUN']]],
     }],
 
     '_TOKEN' : [ None, {
-    'UserAndGroups' : [ None, ['pointer', ['array', lambda x: x.UserAndGroupCount,
+    'UserAndGroups' : [ None, ['pointer', ['array', _get_user_and_group_count,
                                  ['_SID_AND_ATTRIBUTES']]]],
     }],
 
     '_SID' : [ None, {
-    'SubAuthority' : [ None, ['array', lambda x: x.SubAuthorityCount, ['unsigned long']]],
+    'SubAuthority' : [ None, ['array', _get_sub_authority_count, ['unsigned long']]],
     }],
 
     '_CLIENT_ID': [ None, {
@@ -161,6 +185,10 @@ windows_overlay = {
     }],
 }
 
+# Windows unicode strings are UTF-16 little-endian. Binding the decoder
+# once saves a codec registry lookup for every string read.
+_UTF16LE_DECODER = codecs.getdecoder("utf_16_le")
+
 class _UNICODE_STRING(obj.CType):
     """Class representing a _UNICODE_STRING
 
@@ -174,10 +202,17 @@ class _UNICODE_STRING(obj.CType):
         If the claimed length of the string is acceptable, return a unicode string.
         Otherwise, return a NoneObject.
         """
-        data = self.dereference()
-        if data:
-            return unicode(data)
-        return data
+        length = self.Length.v()
+        if length > 0 and length <= 1024:
+            buffer_offset = self.Buffer.v()
+            if not self.obj_native_vm.is_valid_address(buffer_offset):
+                return obj.NoneObject("Invalid Buffer {0:#x} for _UNICODE_STRING".format(buffer_offset))
+            ## Read the raw buffer in one go and decode it directly,
+            ## instead of constructing an intermediate String object
+            ## which would re-read the same bytes.
+            data = self.obj_native_vm.zread(buffer_offset, length)
+            return _UTF16LE_DECODER(data, "replace")[0].split(u"\x00", 1)[0]
+        return obj.NoneObject("Buffer length {0} for _UNICODE_STRING not within bounds".format(length))
 
     def dereference(self):
         length = self.Length.v()
@@ -330,8 +365,19 @@ class _EPROCESS(obj.CType):
 
     def get_process_address_space(self):
         """ Gets a process address space for a task given in _EPROCESS """
+        process_as = self.__dict__.get('_process_as')
+        if process_as is not None:
+            return process_as
+
         directory_table_base = self.Pcb.DirectoryTableBase.v()
 
+        # A zero or misaligned DTB belongs to a smeared or terminated
+        # process. Rejecting it here is much cheaper than building an
+        # address space just to catch its AssertionError. The DTB is
+        # only 32 byte aligned under PAE, so check the low 5 bits.
+        if not directory_table_base or directory_table_base & 0x1f:
+            return obj.NoneObject("Invalid DTB {0:#x} for process AS".format(directory_table_base))
+
         try:
             process_as = self.obj_vm.__class__(self.obj_vm.base, self.obj_vm.get_config(), dtb = directory_table_base)
         except AssertionError, _e:
@@ -339,22 +385,82 @@ class _EPROCESS(obj.CType):
 
         process_as.name = "Process {0}".format(self.UniqueProcessId)
 
+        # Plugins commonly touch Peb, the module lists and the VAD
+        # tree of the same process in one run; keep the constructed
+        # address space on the instance so they all share it.
+        self.newattr('_process_as', process_as)
+
         return process_as
 
     def _get_modules(self, the_list, the_type):
         """Generator for DLLs in one of the 3 PEB lists"""
         if self.UniqueProcessId and the_list:
-            for l in the_list.list_of_type("_LDR_DATA_TABLE_ENTRY", the_type):
+            # Plugins such as dlllist/ldrmodules ask for the same
+            # lists repeatedly while cross-checking; walk each list
+            # once per process and serve later requests from the
+            # cached entries instead of re-reading the linked list.
+            cache = self.__dict__.get('_module_cache')
+            if cache is None:
+                cache = {}
+                self.newattr('_module_cache', cache)
+
+            modules = cache.get(the_type)
+            if modules is None:
+                modules = list(the_list.list_of_type("_LDR_DATA_TABLE_ENTRY", the_type))
+                cache[the_type] = modules
+
+            for l in modules:
                 yield l
 
+    @property
+    def _ldr(self):
+        """The PEB's Ldr structure, resolved once per process.
+
+        The Peb property rebuilds a _PEB on every access, so plugins
+        requesting several of the module lists would otherwise pay the
+        process address space switch three times for the same Ldr.
+        """
+        ldr = self.__dict__.get('_ldr_cache')
+        if ldr is None:
+            ldr = self.Peb.Ldr
+            self.newattr('_ldr_cache', ldr)
+        return ldr
+
     def get_init_modules(self):
-        return self._get_modules(self.Peb.Ldr.InInitializationOrderModuleList, "InInitializationOrderLinks")
+        return self._get_modules(self._ldr.InInitializationOrderModuleList, "InInitializationOrderLinks")
 
     def get_mem_modules(self):
-        return self._get_modules(self.Peb.Ldr.InMemoryOrderModuleList, "InMemoryOrderLinks")
+        return self._get_modules(self._ldr.InMemoryOrderModuleList, "InMemoryOrderLinks")
 
     def get_load_modules(self):
-        return self._get_modules(self.Peb.Ldr.InLoadOrderModuleList, "InLoadOrderLinks")
+        return self._get_modules(self._ldr.InLoadOrderModuleList, "InLoadOrderLinks")
+
+    def ObReferenceObjectByHandle(self, handle, type = None):
+        """Search the object table and retrieve the object by handle.
+
+        On the first lookup the whole table is walked once and indexed
+        by handle value, so resolving many handles against the same
+        process costs one walk rather than one walk per handle.
+
+        @param handle: the handle value to resolve.
+        @param type: an optional type to dereference the resulting
+        _OBJECT_HEADER body as.
+        """
+        index = self.__dict__.get('_handle_index')
+        if index is None:
+            index = {}
+            for hdr in self.ObjectTable.handles():
+                index[int(hdr.HandleValue)] = hdr
+            self.newattr('_handle_index', index)
+
+        header = index.get(int(handle))
+        if header is None:
+            return obj.NoneObject("Could not find handle {0} in ObjectTable".format(handle))
+
+        if type == None:
+            return header
+
+        return header.dereference_as(type)
 
     def get_token(self):
         """Return the process's TOKEN object if its valid"""
@@ -383,10 +489,29 @@ class _TOKEN(obj.CType):
         if self.UserAndGroupCount < 0xFFFF:
             for sa in self.UserAndGroups.dereference():
                 sid = sa.Sid.dereference_as('_SID')
-                for i in sid.IdentifierAuthority.Value:
-                    id_auth = i
-                yield "S-" + "-".join(str(i) for i in (sid.Revision, id_auth) +
-                                      tuple(sid.SubAuthority))
+                if not sid:
+                    continue
+
+                # A SID is a contiguous little structure: revision and
+                # sub authority count bytes, a 6 byte big-endian
+                # identifier authority and the sub authority array.
+                # Read it in one go and unpack it, instead of paying a
+                # CType dereference per field. This also interprets
+                # the full identifier authority rather than just its
+                # last byte as the old per-byte loop did.
+                count = int(sid.SubAuthorityCount)
+                if count < 0 or count > 15:
+                    # SID_MAX_SUB_AUTHORITIES is 15
+                    continue
+
+                data = sid.obj_vm.read(sid.obj_offset, 8 + 4 * count)
+                if not data or len(data) < 8 + 4 * count:
+                    continue
+
+                revision = ord(data[0])
+                id_auth = struct.unpack('>Q', '\x00\x00' + data[2:8])[0]
+                subs = struct.unpack('<{0}I'.format(count), data[8:])
+                yield "S-" + "-".join(str(i) for i in (revision, id_auth) + subs)
 
     def privileges(self):
         """Generator for privileges.
@@ -441,55 +566,86 @@ class _HANDLE_TABLE(obj.CType):
         and iterates over them.
         """
 
-        # The counts below are calculated by taking the size of a page and dividing 
+        # The counts below are calculated by taking the size of a page and dividing
         # by the size of the data type contained within the page. For more information
         # see http://blogs.technet.com/b/markrussinovich/archive/2009/09/29/3283844.aspx
+        profile = self.obj_vm.profile
+
         if level > 0:
-            count = 0x1000 / self.obj_vm.profile.get_obj_size("address")
-            targetType = "address"
-        else:
-            count = 0x1000 / self.obj_vm.profile.get_obj_size("_HANDLE_TABLE_ENTRY")
-            targetType = "_HANDLE_TABLE_ENTRY"
+            count = 0x1000 // profile.get_obj_size("address")
 
-        table = obj.Object("Array", offset = offset, vm = self.obj_vm, count = count,
-                           targetType = targetType, parent = self, native_vm = self.obj_native_vm)
+            table = obj.Object("Array", offset = offset, vm = self.obj_vm, count = count,
+                               targetType = "address", parent = self, native_vm = self.obj_native_vm)
 
-        if table:
-            for entry in table:
-                if not entry.is_valid():
-                    break
+            if table:
+                for entry in table:
+                    if not entry.is_valid():
+                        break
 
-                if level > 0:
                     ## We need to go deeper:
                     for h in self._make_handle_array(entry, level - 1, depth):
                         yield h
-                    depth += 1
-                else:
-
-                    # All handle values are multiples of four, on both x86 and x64. 
-                    handle_multiplier = 4
-                    # Calculate the starting handle value for this level. 
-                    handle_level_base = depth * count * handle_multiplier
-                    # The size of a handle table entry.
-                    handle_entry_size = self.obj_vm.profile.get_obj_size("_HANDLE_TABLE_ENTRY")
-                    # Finally, compute the handle value for this object. 
-                    handle_value = ((entry.obj_offset - offset) /
-                                   (handle_entry_size / handle_multiplier)) + handle_level_base
-
-                    ## OK We got to the bottom table, we just resolve
-                    ## objects here:
-                    item = self.get_item(entry, handle_value)
-
-                    if item == None:
-                        continue
-
-                    try:
-                        # New object header
-                        if item.TypeIndex != 0x0:
-                            yield item
-                    except AttributeError:
-                        if item.Type.Name:
-                            yield item
+                    # Advance by the number of leaf tables this entry
+                    # covered: one for a pointer to a bottom table,
+                    # count of them for each intermediate table.
+                    depth += count ** (level - 1)
+            return
+
+        # The per-entry constants below are the same for every handle
+        # table in a profile, so they are computed once and cached.
+        info = getattr(profile, '_handle_table_entry_info', None)
+        if info is None:
+            handle_entry_size = profile.get_obj_size("_HANDLE_TABLE_ENTRY")
+            object_offset = profile.get_obj_offset("_HANDLE_TABLE_ENTRY", "Object")
+            pointer_format = "<Q" if profile.get_obj_size("address") == 8 else "<I"
+            info = (handle_entry_size, object_offset, pointer_format)
+            profile._handle_table_entry_info = info
+        handle_entry_size, object_offset, pointer_format = info
+
+        # All handle values are multiples of four, on both x86 and x64.
+        handle_multiplier = 4
+        count = 0x1000 // handle_entry_size
+        entry_stride = handle_entry_size // handle_multiplier
+        # Calculate the starting handle value for this level.
+        handle_level_base = depth * count * handle_multiplier
+
+        # Read the whole leaf page in one go and pre-filter it with a
+        # raw scan: free slots have a zero Object pointer and are
+        # dropped here, so only live entries pay for the construction
+        # of a _HANDLE_TABLE_ENTRY and its _OBJECT_HEADER.
+        data = self.obj_vm.read(offset, 0x1000)
+        if not data:
+            return
+
+        for slot in range(count):
+            entry_offset = slot * handle_entry_size
+            pointer_value = struct.unpack_from(pointer_format, data,
+                                               entry_offset + object_offset)[0]
+            if not pointer_value:
+                continue
+
+            entry = obj.Object("_HANDLE_TABLE_ENTRY", offset = offset + entry_offset,
+                               vm = self.obj_vm, parent = self, native_vm = self.obj_native_vm)
+            if entry is None:
+                continue
+
+            # Finally, compute the handle value for this object.
+            handle_value = (entry_offset // entry_stride) + handle_level_base
+
+            ## OK We got to the bottom table, we just resolve
+            ## objects here:
+            item = self.get_item(entry, handle_value)
+
+            if item == None:
+                continue
+
+            try:
+                # New object header
+                if item.TypeIndex != 0x0:
+                    yield item
+            except AttributeError:
+                if item.Type.Name:
+                    yield item
 
     def handles(self):
         """ A generator which yields this process's handles
@@ -534,16 +690,47 @@ class _OBJECT_HEADER(obj.CType):
     def find_optional_headers(self):
         """Find this object's optional headers."""
         offset = self.obj_offset
+        profile = self.obj_vm.profile
+
+        # Which optional headers exist and where their offset bytes
+        # live is fixed per profile, so resolve that once instead of
+        # doing a has_type check and a member dereference per header
+        # for every object instantiated.
+        info = getattr(profile, '_object_header_optional_info', None)
+        if info is None:
+            # The offset members are resolved from this instance's own
+            # members dict: going through profile.get_obj_offset would
+            # construct another _OBJECT_HEADER and recurse back here.
+            fields = []
+            for name, objtype in self.optional_headers:
+                member = self.members.get(name + 'Offset')
+                if member is not None and profile.has_type(objtype):
+                    fields.append((name, objtype, int(member[0])))
+            if fields:
+                base = min(field_offset for _, _, field_offset in fields)
+                span = max(field_offset for _, _, field_offset in fields) - base + 1
+            else:
+                base = span = 0
+            info = (fields, base, span)
+            profile._object_header_optional_info = info
+
+        fields, base, span = info
+        if not fields:
+            return
+
+        # The offset members are single adjacent bytes, so one read
+        # covers all of them.
+        raw = self.obj_vm.read(offset + base, span) or ''
 
-        for name, objtype in self.optional_headers:
-            if self.obj_vm.profile.has_type(objtype):
-                header_offset = self.m(name + 'Offset').v()
-                if header_offset:
-                    o = obj.Object(objtype, offset - header_offset, vm = self.obj_vm, native_vm = self.obj_native_vm)
-                else:
-                    o = obj.NoneObject("Header {0} not set for object at {1:#x}".format(name, offset))
+        for name, objtype, field_offset in fields:
+            index = field_offset - base
+            header_offset = ord(raw[index]) if index < len(raw) else 0
+            if header_offset:
+                o = obj.Object(objtype, offset - header_offset, vm = self.obj_vm, native_vm = self.obj_native_vm)
+            else:
+                o = obj.NoneObject("Header {0} not set for object at {1:#x}".format(name, offset))
 
-                self.newattr(name, o)
+            self.newattr(name, o)
 
     @property
     def GrantedAccess(self):
@@ -571,6 +758,12 @@ class _OBJECT_HEADER(obj.CType):
 
         return True
 
+# All 64 possible ACL strings, indexed by the six access flags packed
+# into an integer (bit 0 = ReadAccess ... bit 5 = SharedDelete).
+_ACCESS_STRINGS = ["".join((flag if (index >> bit) & 1 else "-")
+                           for bit, flag in enumerate("RWDrwd"))
+                   for index in range(64)]
+
 class _FILE_OBJECT(obj.CType):
     """Class for file objects"""
 
@@ -579,8 +772,17 @@ class _FILE_OBJECT(obj.CType):
         of the device object to which the file belongs"""
         name = ""
         if self.DeviceObject:
+            profile = self.obj_vm.profile
+            # get_obj_offset compiles a dummy object on every call, so
+            # the Body offset is cached on the profile the first time
+            # it is needed. Handle enumeration resolves this per file
+            # object, which makes the repeated lookup noticeable.
+            body_offset = getattr(profile, '_object_header_body_offset', None)
+            if body_offset is None:
+                body_offset = profile.get_obj_offset("_OBJECT_HEADER", "Body")
+                profile._object_header_body_offset = body_offset
             object_hdr = obj.Object("_OBJECT_HEADER",
-                            self.DeviceObject - self.obj_vm.profile.get_obj_offset("_OBJECT_HEADER", "Body"),
+                            self.DeviceObject - body_offset,
                             self.obj_native_vm)
             if object_hdr:
                 name = "\\Device\\{0}".format(str(object_hdr.NameInfo.Name or ''))
@@ -589,14 +791,15 @@ class _FILE_OBJECT(obj.CType):
         return name
 
     def access_string(self):
-        ## Make a nicely formatted ACL string
-        AccessStr = (((self.ReadAccess > 0 and "R") or '-') +
-                     ((self.WriteAccess > 0  and "W") or '-') +
-                     ((self.DeleteAccess > 0 and "D") or '-') +
-                     ((self.SharedRead > 0 and "r") or '-') +
-                     ((self.SharedWrite > 0 and "w") or '-') +
-                     ((self.SharedDelete > 0 and "d") or '-'))
-        return AccessStr
+        ## Make a nicely formatted ACL string by packing the six
+        ## access flags into an index into the precomputed table.
+        index = ((self.ReadAccess > 0) |
+                 (self.WriteAccess > 0) << 1 |
+                 (self.DeleteAccess > 0) << 2 |
+                 (self.SharedRead > 0) << 3 |
+                 (self.SharedWrite > 0) << 4 |
+                 (self.SharedDelete > 0) << 5)
+        return _ACCESS_STRINGS[index]
 
 ## This is an object which provides access to the VAD tree.
 class _MMVAD(obj.CType):
@@ -630,18 +833,27 @@ class _MMVAD(obj.CType):
         args.pop('struct_size', None)
         args.pop('members', None)
 
-        # Start off with an _MMVAD_LONG
-        result = obj.Object('_MMVAD_LONG', offset = offset, vm = vm, parent = parent, **args)
+        # The tag sits at a profile-dependent offset before the
+        # structure (-4 on x86, -12 on x64). Cache that offset on the
+        # profile since get_obj_offset builds a dummy object per call.
+        profile = vm.profile
+        tag_offset = getattr(profile, '_mmvad_tag_offset', None)
+        if tag_offset is None:
+            tag_offset = profile.get_obj_offset('_MMVAD_SHORT', 'Tag')
+            profile._mmvad_tag_offset = tag_offset
+
+        # Read the tag as raw bytes so that we can dispatch on it
+        # directly, rather than instantiating a throwaway _MMVAD_LONG
+        # (and its String member) per node just to inspect the tag.
+        if offset + tag_offset < 0:
+            return obj.NoneObject("MMVAD probably instantiated from a NULL pointer, there is no tag to read")
 
-        # Get the tag and change the vad type if necessary
-        real_type = cls.tag_map.get(str(result.Tag), None)
+        tag = vm.zread(offset + tag_offset, 4)
+        real_type = cls.tag_map.get(tag, None)
         if not real_type:
-            return obj.NoneObject("Tag {0} not known".format(str(result.Tag)))
-
-        if result.__class__.__name__ != real_type:
-            result = obj.Object(real_type, offset = offset, vm = vm, parent = parent, **args)
+            return obj.NoneObject("Tag {0} not known".format(tag))
 
-        return result
+        return obj.Object(real_type, offset = offset, vm = vm, parent = parent, **args)
 
 class _MMVAD_SHORT(obj.CType):
     """Class with convenience functions for _MMVAD_SHORT functions"""
@@ -656,23 +868,76 @@ class _MMVAD_SHORT(obj.CType):
         then the right items.
 
         We try to be tolerant of cycles by storing all offsets visited.
+
+        The walk is iterative (using an explicit stack) rather than
+        recursive, since large VAD trees would otherwise pay a python
+        function call per node and can exceed the recursion limit.
         """
         if visited == None:
+            ## A plain set of offsets is deliberately used for cycle
+            ## detection. Probabilistic or packed alternatives (bloom
+            ## filters, sorted arrays) would either risk false
+            ## positives, silently dropping whole subtrees from the
+            ## output, or turn the O(1) membership test into a per
+            ## node O(log n) / O(n) insert. Even a very wide tree of
+            ## a few hundred thousand VADs keeps the set in the tens
+            ## of megabytes, which is noise next to the image itself.
             visited = set()
 
-        ## We try to prevent loops here
-        if self.obj_offset in visited:
-            return
-
-        yield self
-
-        for c in self.LeftChild.traverse(visited = visited):
-            visited.add(c.obj_offset)
-            yield c
-
-        for c in self.RightChild.traverse(visited = visited):
-            visited.add(c.obj_offset)
-            yield c
+        vm = self.obj_native_vm
+        profile = vm.profile
+        tag_offset = getattr(profile, '_mmvad_tag_offset', None)
+        if tag_offset is None:
+            tag_offset = profile.get_obj_offset('_MMVAD_SHORT', 'Tag')
+            profile._mmvad_tag_offset = tag_offset
+        tag_map = _MMVAD.tag_map
+
+        ## VAD nodes are small pool allocations that cluster tightly,
+        ## so children very often live on the same page as their
+        ## parent. We keep the most recently read page around and
+        ## serve the child tag lookups from it, which saves an address
+        ## space round trip per child and lets us dispatch straight to
+        ## the real node type without going through the _MMVAD factory.
+        page_va = None
+        page_data = None
+
+        stack = [self]
+        push = stack.append
+        mark_visited = visited.add
+
+        while stack:
+            node = stack.pop()
+            offset = node.obj_offset
+
+            ## We try to prevent loops here
+            if offset in visited:
+                continue
+            mark_visited(offset)
+
+            yield node
+
+            ## The right child is pushed first so that the left
+            ## subtree is generated before the right subtree, which
+            ## preserves the ordering of the old recursive walk.
+            for member in ("RightChild", "LeftChild"):
+                target = node.m(member).v()
+                tag_va = target + tag_offset
+                if not target or tag_va < 0:
+                    continue
+
+                if page_data is None or tag_va < page_va or tag_va + 4 > page_va + 0x1000:
+                    page_va = tag_va & ~0xFFF
+                    page_data = vm.zread(page_va, 0x1000)
+
+                tag = page_data[tag_va - page_va:tag_va - page_va + 4]
+                real_type = tag_map.get(tag, None)
+                if not real_type:
+                    continue
+
+                child = obj.Object(real_type, offset = target, vm = vm,
+                                   parent = node, name = member)
+                if child:
+                    push(child)
 
     @property
     def Parent(self):
@@ -711,10 +976,14 @@ class _MMVAD_LONG(_MMVAD_SHORT):
 class _EX_FAST_REF(obj.CType):
 
     MAX_FAST_REF = 7
+    # The negated mask never changes, so compute it when the class is
+    # defined: dereference_as runs once per handle table entry and
+    # should not redo the negation every time.
+    MAX_FAST_REF_MASK = ~MAX_FAST_REF
 
     def dereference_as(self, theType, parent = None, **kwargs):
         """Use the _EX_FAST_REF.Object pointer to resolve an object of the specified type"""
-        return obj.Object(theType, self.Object.v() & ~self.MAX_FAST_REF, self.obj_native_vm, parent = parent or self, **kwargs)
+        return obj.Object(theType, self.Object.v() & self.MAX_FAST_REF_MASK, self.obj_native_vm, parent = parent or self, **kwargs)
 
 class ThreadCreateTimeStamp(WinTimeStamp):
     """Handles ThreadCreateTimeStamps which are bit shifted WinTimeStamps"""
@@ -860,14 +1129,48 @@ class _CM_KEY_BODY(obj.CType):
     """Registry key"""
 
     def full_key_name(self):
-        output = []
-        kcb = self.KeyControlBlock
+        profile = self.obj_vm.profile
+        # Key control blocks form a tree, so sibling keys share all
+        # but the last path segment. Remember the full name of every
+        # KCB we resolve (keyed by offset, on the profile) so each one
+        # only pays for the walk to the root once per run.
+        cache = getattr(profile, '_kcb_full_name_cache', None)
+        if cache is None:
+            cache = {}
+            profile._kcb_full_name_cache = cache
+
+        # Walk towards the root, stopping early if we reach a KCB
+        # whose name has already been computed. The seen set breaks
+        # ParentKcb cycles, which corrupt registry data can contain
+        # and which would otherwise hang the walk forever.
+        path = []
+        prefix = ""
+        seen = set()
+        kcb = self.KeyControlBlock.dereference()
         while kcb.ParentKcb:
+            offset = kcb.obj_offset
+            if offset in seen:
+                break
+            seen.add(offset)
+            cached = cache.get(offset)
+            if cached is not None:
+                prefix = cached
+                break
             if kcb.NameBlock.Name == None:
                 break
-            output.append(str(kcb.NameBlock.Name))
-            kcb = kcb.ParentKcb
-        return "\\".join(reversed(output))
+            path.append((offset, str(kcb.NameBlock.Name)))
+            kcb = kcb.ParentKcb.dereference()
+
+        # Unwind, recording the full name of every KCB visited.
+        name = prefix
+        for offset, segment in reversed(path):
+            if name:
+                name = name + "\\" + segment
+            else:
+                name = segment
+            cache[offset] = name
+
+        return name
 
 class _MMVAD_FLAGS(obj.CType):
     """This is for _MMVAD_SHORT.u.VadFlags"""
@@ -897,6 +1200,63 @@ class _POOL_HEADER(obj.CType):
     def PagedPool(self):
         return self.PoolType.v() % 2 == 0 and self.PoolType.v() > 0
 
+class _PHYSICAL_MEMORY_DESCRIPTOR(obj.CType):
+    """A class for physical memory descriptors.
+
+    The Run member remains available for structured access; the
+    helpers below unpack the whole run array from one read so that
+    callers checking many physical addresses do not have to iterate
+    _PHYSICAL_MEMORY_RUN objects in python.
+    """
+
+    def get_runs(self):
+        """Return the memory runs as a list of (base page, page count) tuples."""
+        runs = self.__dict__.get('_runs')
+        if runs is not None:
+            return runs
+
+        profile = self.obj_vm.profile
+        number_of_runs = int(self.NumberOfRuns)
+        run_size = profile.get_obj_size('_PHYSICAL_MEMORY_RUN')
+        run_offset = profile.get_obj_offset('_PHYSICAL_MEMORY_DESCRIPTOR', 'Run')
+
+        runs = []
+        if 0 < number_of_runs < 0x10000:
+            data = self.obj_vm.read(self.obj_offset + run_offset,
+                                    number_of_runs * run_size)
+            if data and run_size in (8, 16):
+                run_format = '<QQ' if run_size == 16 else '<II'
+                for run in range(number_of_runs):
+                    runs.append(struct.unpack_from(run_format, data, run * run_size))
+            else:
+                # Unexpected layout or unreadable array: fall back to
+                # the object layer.
+                for run in self.Run:
+                    runs.append((int(run.BasePage), int(run.PageCount)))
+
+        self.newattr('_runs', runs)
+        return runs
+
+    def contains_physical_address(self, address):
+        """Whether a physical address falls inside any memory run.
+
+        The runs are kept sorted by base page (they are emitted that
+        way by the kernel), so membership is a bisect over plain
+        integers rather than a linear scan of run objects.
+        """
+        starts = self.__dict__.get('_run_starts')
+        if starts is None:
+            starts = [base_page for base_page, _ in self.get_runs()]
+            self.newattr('_run_starts', starts)
+
+        pfn = address >> 12
+        index = bisect.bisect_right(starts, pfn) - 1
+        if index < 0:
+            return False
+
+        base_page, page_count = self.get_runs()[index]
+        return pfn < base_page + page_count
+
 import crash_vtypes
 import hibernate_vtypes
 import kdbg_vtypes
@@ -956,6 +1316,7 @@ class WindowsObjectClasses(obj.ProfileModification):
             '_MMSECTION_FLAGS': _MMSECTION_FLAGS,
             '_TOKEN': _TOKEN,
             '_POOL_HEADER': _POOL_HEADER,
+            '_PHYSICAL_MEMORY_DESCRIPTOR': _PHYSICAL_MEMORY_DESCRIPTOR,
             })
 
 class AbstractKDBGMod(obj.ProfileModification):
@@ -18,7 +18,6 @@
 # along with Volatility.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-import copy
 import volatility.obj as obj
 import volatility.plugins.overlays.windows.windows as windows
 
@@ -31,12 +30,16 @@ class Pointer64Decorator(object):
 
     def __call__(self, name, typeList, typeDict = None):
         if len(typeList) and typeList[0] == 'pointer64':
-            typeList = copy.deepcopy(typeList)
+            # Only the first element is replaced, so a shallow copy is
+            # enough; deepcopy here ran for every pointer64 member of
+            # every x64 profile compiled.
+            typeList = list(typeList)
             typeList[0] = 'pointer'
         return self.f(name, typeList, typeDict)
 
 class _EX_FAST_REF(windows._EX_FAST_REF):
     MAX_FAST_REF = 15
+    MAX_FAST_REF_MASK = ~MAX_FAST_REF
 
 class ExFastRefx64(obj.ProfileModification):
     before = ['WindowsOverlay', 'WindowsObjectClasses']